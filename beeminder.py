@@ -17,8 +17,11 @@ updates; asks for nothing
 this is an api goal; checks for registered handlers, applies them;
 can be called via systemctl assuming secrets are provided...
 >>> beeminder todoist
-this is an external goal; displays useful information >>> beeminder todoist edit """
-import requests
+this is an external goal; displays useful information >>> beeminder todoist edit
+
+Goal slugs complete from a local index refreshed on every goal fetch:
+>>> eval "$(_BEEMINDER_COMPLETE=bash_source beeminder)"
+"""
 from datetime import datetime, timedelta, timezone, date
 import json
 import click
@@ -29,27 +32,68 @@ from random import choice
 import webbrowser
 import humanize
 import math
-import dateutil, dateutil.parser
-import numpy as np
 import itertools
-from dataclasses import dataclass
-import tqdm
+from dataclasses import dataclass, fields, asdict
 import pathlib
 import concurrent.futures
 import functools
 from pprint import pprint
-from tabulate import tabulate
 import subprocess
-import dateparser
+import importlib
+import threading
+import csv
+import io
+import sys
+import time
+import queue
+import urllib.parse
 
 __version__ = "0.1.0"
 
+
+class LazyModule:
+    """Module imported on first attribute access, to keep startup fast."""
+
+    def __init__(self, name):
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(importlib.import_module(self._name), attr)
+
+
+requests = LazyModule("requests")
+
 username = os.environ["BEEMINDER_USERNAME"]
 beeminder_auth_token = os.environ["BEEMINDER_TOKEN"]
 auth = {"username": username, "auth_token": os.environ["BEEMINDER_TOKEN"]}
+# seconds; keeps a hung Beeminder endpoint from stalling runs
+api_timeout = 30
 
 now = datetime.now()
 
+app_dir = pathlib.Path(click.get_app_dir("beeminder"))
+config_path = app_dir / "config.json"
+state_path = app_dir / "state.json"
+slug_index_path = app_dir / "slugs.json"
+github_cache_path = app_dir / "github.json"
+backlog_cache_dir = app_dir / "backlogs"
+
+
+def load_json(path, default=None):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {} if default is None else default
+
+
+def dump_json(path, obj):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(obj, f, indent=2)
+    os.replace(tmp_path, path)
+
 
 def increment_beeminder(desc, beeminder_goal, value=1, date=None):
     data = {
@@ -62,6 +106,7 @@ def increment_beeminder(desc, beeminder_goal, value=1, date=None):
     response = requests.post(
         f"https://www.beeminder.com/api/v1/users/{username}/goals/{beeminder_goal}/datapoints.json",
         data=data,
+        timeout=api_timeout,
     )
     return response
 
@@ -79,6 +124,15 @@ class Datapoint:
     daystamp: str
     fulltext: str
 
+    @classmethod
+    def from_dict(cls, dp):
+        """Build from a payload that may omit or add fields, e.g. a POST response."""
+        dp = {field.name: dp.get(field.name) for field in fields(cls)}
+        if dp["canonical"] is None:
+            day = int(dp["daystamp"][-2:])
+            dp["canonical"] = f"{day} {dp['value']} \"{dp['comment']}\""
+        return cls(**dp)
+
     @property
     def datetime(self):
         return datetime.fromtimestamp(self.timestamp)
@@ -98,6 +152,11 @@ class Goal:
 
     def __init__(self, **goal):
         """TODO."""
+        self.load(goal)
+
+    def load(self, goal):
+        """(Re)set fields from a goal dictionary as returned by the API."""
+        self.invalidate_cache()
         if "losedate" in goal:
             self._losedate = datetime.utcfromtimestamp(goal["losedate"])
         else:
@@ -114,13 +173,17 @@ class Goal:
         self.curval = goal.get("curval")
         self.runits = goal.get("runits")
         if "last_datapoint" in goal:
-            self.last_datapoint = Datapoint(**goal["last_datapoint"])
+            self.last_datapoint = Datapoint.from_dict(goal["last_datapoint"])
         else:
             self.last_datapoint = None
         self.dictionary = goal
         self.won = goal.get("won")
         # self.updated_at = datetime.fromtimestamp(goal.get("updated_at"))
 
+    def invalidate_cache(self):
+        for cached in ["data_rate", "format_epsilon_delta"]:
+            self.__dict__.pop(cached, None)
+
     @property
     def losedate(self):
         return datetime.utcfromtimestamp(self.dictionary["losedate"])
@@ -264,6 +327,38 @@ class Goal:
             "last datapoint",
         )
 
+    @property
+    def record(self):
+        """Machine-readable summary, with the raw values behind it."""
+        data_rate = self.data_rate
+        return {
+            **dict(zip(self.record_keys, self.summary)),
+            "slug": self.slug,
+            "goal_type": self.type,
+            "color": self.color,
+            "curval": self.curval,
+            "safebump": self.safebump,
+            "bumpval": self.bumpval,
+            "data_rate": None if data_rate is NotImplemented else data_rate,
+            "rate_value": self.rate,
+            "runits": self.runits,
+            "losedate": self.dictionary.get("losedate"),
+            "last_datapoint_value": self.last_datapoint.value,
+            "last_datapoint_timestamp": self.last_datapoint.timestamp,
+            "won": self.won,
+        }
+
+    record_keys = (
+        "epsilon_delta",
+        "frac",
+        "name",
+        "bump",
+        "remaining",
+        "rate",
+        "lose_date",
+        "last_datapoint",
+    )
+
     @property
     def is_do_less(self):
         return self.type == "drinker"  # and a fiend
@@ -280,15 +375,59 @@ class Goal:
         )
         params = auth.copy()
         params["datapoints"] = "true"
-        r = requests.get(url, params=params).json()
+        r = requests.get(url, params=params, timeout=api_timeout).json()
         self.dictionary = r
         return r
 
     @property
     def datapoints(self):
-        datapoints = [Datapoint(**dp) for dp in self.dictionary["datapoints"]]
+        datapoints = [Datapoint.from_dict(dp) for dp in self.dictionary["datapoints"]]
         return sorted(datapoints, key=lambda dp: dp.datetime)
 
+    def refresh_metadata(self):
+        """Refetch server-computed fields, keeping the local datapoints."""
+        url = (
+            f"https://www.beeminder.com/api/v1/users/{username}/goals/{self.slug}.json"
+        )
+        r = requests.get(url, params=auth, timeout=api_timeout).json()
+        if "datapoints" in self.dictionary:
+            r["datapoints"] = self.dictionary["datapoints"]
+        self.load(r)
+        return r
+
+    def merge_datapoint(self, dp):
+        """Apply a freshly created datapoint locally, without refetching.
+
+        Returns False if `curval` could not be derived locally - the datapoint
+        is backdated, or the goal aggregates days other than by sum (cumulative
+        goals) or last value - in which case the goal needs a refresh.
+        """
+        datapoint = Datapoint.from_dict(dp)
+        dp = asdict(datapoint)
+        if "datapoints" in self.dictionary:
+            self.dictionary["datapoints"].append(dp)
+        self.invalidate_cache()
+
+        is_newest = (
+            self.last_datapoint is None
+            or datapoint.timestamp >= self.last_datapoint.timestamp
+        )
+        if not is_newest:
+            return False
+        self.dictionary["last_datapoint"] = dp
+        self.last_datapoint = datapoint
+
+        kyoom = self.dictionary.get("kyoom")
+        aggday = self.dictionary.get("aggday") or ("sum" if kyoom else "last")
+        if kyoom and aggday == "sum" and self.curval is not None:
+            self.curval += datapoint.value
+        elif not kyoom and aggday == "last":
+            self.curval = datapoint.value
+        else:
+            return False
+        self.dictionary["curval"] = self.curval
+        return True
+
     def ensure_datapoints(self):
         if "datapoints" not in self.dictionary or not self.dictionary["datapoints"]:
             self.get_full_data()
@@ -330,14 +469,23 @@ class Goal:
         else:
             raise ValueError("Wrong color, this should not be possible")
 
-    def update(self, value, description=None, date=None):
+    def update(self, value, description=None, date=None, refresh=False):
+        """Post a datapoint and apply it locally.
+
+        `refresh` additionally refetches server-computed fields (road, lane,
+        safebump...) that cannot be derived locally; this also happens when
+        the datapoint itself cannot be applied locally.
+        """
         if value is None:
             value = 1
         if description is None:
             description = self.default_description
         click.echo(f"Updating {self} with {value} and description {description}")
         return_value = increment_beeminder(description, self.slug, value, date)
-        self.get_full_data()
+        if return_value.ok and not self.merge_datapoint(return_value.json()):
+            refresh = True
+        if refresh:
+            self.refresh_metadata()
         return return_value
 
     def show_web(self):
@@ -346,15 +494,16 @@ class Goal:
 
 
 class RemoteApiGoal(Goal):
-    def update(self, *args, **kwargs):
+    def update(self, *args, refresh=False, **kwargs):
         if args or kwargs:
             click.echo(
                 "This is a remote goal, I can't update it from here.\n"
                 "I'm going to ignore this and just call for a remote update."
             )
         url = f"https://www.beeminder.com/api/v1/users/{username}/goals/{self.slug}/refresh_graph.json"
-        r = requests.get(url, params=auth)
-        self.get_full_data()
+        r = requests.get(url, params=auth, timeout=api_timeout)
+        if refresh:
+            self.refresh_metadata()
         click.echo(f"Updated {self.slug}.")
 
 
@@ -364,13 +513,16 @@ class TogglGoal(RemoteApiGoal):
         return not (self.last_datapoint.value == 0.0)
 
 
-class TodoistGoal(Goal):
+_todoist_lock = threading.Lock()
+
+
+@functools.lru_cache()
+def _todoist_api():
     import todoist
 
     key = os.environ["TODOIST_KEY"]
     api = todoist.TodoistAPI(key)
     api.sync()
-    now = datetime.now(timezone.utc)
 
     children = itertools.groupby(api.items.all(), lambda item: item["parent_id"])
 
@@ -381,20 +533,111 @@ class TodoistGoal(Goal):
             parent = id_task[parent_id]
             these_children = list(these_children)
             parent["children_ids"] = [child["id"] for child in these_children]
+    return api
+
+
+def todoist_api():
+    """Synced Todoist API, created on first use rather than at import."""
+    with _todoist_lock:
+        return _todoist_api()
+
+
+class TodoistGoal(Goal):
+    source = "todoist"
+
+    @property
+    def api(self):
+        return todoist_api()
+
 
+class ComputedGoalMixIn:
+    """Goal whose value is computed locally, from an integration."""
+
+    # "thread" for I/O-bound integrations, "process" for subprocess/CPU-heavy ones
+    executor = "thread"
+    timeout = 60
+
+    def compute(self):
+        """Return the `(value, message)` this goal should be updated with."""
+        raise NotImplementedError
+
+    def is_unchanged(self, value):
+        return self.last_datapoint is not None and self.last_datapoint.value == value
+
+    def post_computed(self, value, message):
+        if self.is_unchanged(value):
+            click.echo(f"{self} unchanged at {value}, not posting.")
+            return None
+        response = super().update(value, message)
+        response.raise_for_status()
+        return response
 
-class LinearBacklogMixIn:
     def update(self, *args, **kwargs):
-        dates = self.get_dates()
+        return self.post_computed(*self.compute())
 
-        total = -np.sum(np.array(dates) - self.now)
-        try:
-            total_days = total.days + total.seconds / 3600 / 24
-        except AttributeError:
-            total_days = 0
 
-        message = f"Incremented {self.slug} to {total_days} automatically from {len(dates)} items at {now}"
-        super().update(total_days, message)
+class BacklogAges:
+    """Running total of the ages of backlog items, keyed by item ID.
+
+    Creation times are kept as UTC epoch seconds, so the total age at any
+    moment is `len(items) * now - sum(created)`, updated in constant time as
+    items are added or completed.
+    """
+
+    def __init__(self, created=None):
+        self.created = dict(created or {})
+        self.total_created = sum(self.created.values())
+
+    def __len__(self):
+        return len(self.created)
+
+    def add(self, item_id, created):
+        self.remove(item_id)
+        self.created[item_id] = created
+        self.total_created += created
+
+    def remove(self, item_id):
+        self.total_created -= self.created.pop(item_id, 0)
+
+    @staticmethod
+    def to_epoch_seconds(dates):
+        """Convert datetimes to UTC epoch seconds; naive ones are taken as local."""
+        return [int(d.astimezone(timezone.utc).timestamp()) for d in dates]
+
+    def sync(self, items, parse):
+        """Match `items` (ID -> raw creation date), parsing only unseen IDs."""
+        for item_id in self.created.keys() - items.keys():
+            self.remove(item_id)
+        new_ids = [item_id for item_id in items if item_id not in self.created]
+        created = self.to_epoch_seconds([parse(items[item_id]) for item_id in new_ids])
+        for item_id, seconds in zip(new_ids, created):
+            self.add(item_id, seconds)
+
+    def total_days(self, at):
+        at = int(at.timestamp())
+        return (len(self) * at - self.total_created) / 86400
+
+
+class LinearBacklogMixIn(ComputedGoalMixIn):
+    def get_items(self):
+        """Return `{item_id: raw creation date}` for the items in the backlog."""
+        raise NotImplementedError
+
+    @property
+    def backlog_cache_path(self):
+        return backlog_cache_dir / f"{self.slug}.json"
+
+    def compute(self):
+        import dateutil.parser
+
+        items = {str(item_id): added for item_id, added in self.get_items().items()}
+        ages = BacklogAges(load_json(self.backlog_cache_path))
+        ages.sync(items, dateutil.parser.parse)
+        dump_json(self.backlog_cache_path, ages.created)
+
+        total_days = ages.total_days(datetime.now(timezone.utc))
+        message = f"Incremented {self.slug} to {total_days} automatically from {len(ages)} items at {now}"
+        return total_days, message
 
 
 class TodoistBacklog(LinearBacklogMixIn, TodoistGoal):
@@ -412,13 +655,12 @@ class TodoistBacklog(LinearBacklogMixIn, TodoistGoal):
         else:
             return True
 
-    def get_dates(self):
+    def get_items(self):
         undone_tasks = self.api.items.all(self._filter)
-        dates = [dateutil.parser.parse(task["date_added"]) for task in undone_tasks]
-        return dates
+        return {task["id"]: task["date_added"] for task in undone_tasks}
 
 
-class TodoistNumberOfTasksGoal(TodoistGoal):
+class TodoistNumberOfTasksGoal(ComputedGoalMixIn, TodoistGoal):
     # def __init__(self, *args, **kwargs):   # maybe like this?
     #     self._filter = kwargs.pop("filter")
     #     super().__init(*args, **kwargs)
@@ -427,14 +669,14 @@ class TodoistNumberOfTasksGoal(TodoistGoal):
     def _filter(task):
         raise NotImplementedError
 
-    def update(self, *args, **kwargs):
+    def compute(self):
         tasks = self.api.items.all(self._filter)
         if len(tasks) <= 5:
             task_message = "; ".join([task["content"] for task in tasks])
         else:
             task_message = len(tasks)
         message = f"{self.slug}: {task_message} tasks at {now}"
-        super().update(len(tasks), message)
+        return len(tasks), message
 
 
 class TodoistUnprioritized(TodoistNumberOfTasksGoal):
@@ -462,30 +704,34 @@ class TodoistInbox(TodoistNumberOfTasksGoal):
 
 
 class YoutubeBacklogGoal(LinearBacklogMixIn, Goal):
-    def get_dates(self):
+    source = "youtube"
+
+    def get_items(self):
         import pafy
 
         url = "https://www.youtube.com/playlist?list=PLvENAQ9GutPF3r2x5NPBipuqOXn3uUYbF"
         playlist = pafy.get_playlist(url)
-        dates = [
-            dateutil.parser.parse(item["playlist_meta"]["added"])
+        return {
+            item["playlist_meta"]["encrypted_id"]: item["playlist_meta"]["added"]
             for item in playlist["items"]
-        ]
-        return dates
+        }
 
 
-class CountGoal(Goal):
+class CountGoal(ComputedGoalMixIn, Goal):
     def get_count(self):
         raise NotImplementedError
 
-    def update(self, *args, **kwargs):
+    def compute(self):
         count_items = self.get_count()
 
         message = f"Incremented {self.slug} to {count_items} items at {now}"
-        super().update(count_items, message)
+        return count_items, message
 
 
 class PubsCountGoal(CountGoal):
+    executor = "process"
+    source = "pubs"
+
     def get_count(self):
         from pubs import repo, config
         from pubs.query import get_paper_filter
@@ -503,17 +749,24 @@ class PubsCountGoal(CountGoal):
 
 class BashCountGoal(CountGoal):
     command = NotImplemented
+    executor = "process"
 
     def get_count(self):
         if self.command is NotImplemented:
             raise ValueError("BashCountGoal subclass must implement `command`")
         proc = subprocess.run(
-            self.command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, shell=True
+            self.command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            shell=True,
+            timeout=self.timeout,
         )
         return int(proc.stdout.strip())
 
 
 class TogglCountGoal(CountGoal):
+    source = "toggl"
+
     def get_count(self):
         key = os.environ["TOGGL_KEY"]
         auth = (key, "api_token")
@@ -532,7 +785,7 @@ class TogglCountGoal(CountGoal):
             }
 
             url = "https://toggl.com/reports/api/v2/details"
-            r = requests.get(url, auth=auth, params=params)
+            r = requests.get(url, auth=auth, params=params, timeout=self.timeout)
             data = r.json()["data"]
             results.extend(data)
             if len(data) == r.json()["per_page"]:
@@ -543,13 +796,89 @@ class TogglCountGoal(CountGoal):
 
 
 class GithubCountGoal(CountGoal):
+    source = "github"
+
+    per_page = 50
+
     def get_count(self):
+        """Count notifications across all pages.
+
+        Every page is requested conditionally on its own cached ETag and
+        Last-Modified, concurrently, so an unchanged inbox costs one 304 per
+        page and a change on any page is noticed; a full last page is
+        followed by a probe for new ones. GitHub's X-Poll-Interval is
+        honoured by returning the cached count until it has passed.
+        """
         GITHUBUSERNAME = os.environ["GITHUBUSERNAME"]
         GITHUBTOKEN = os.environ["GITHUBTOKEN"]
-        response = requests.get(
-            "https://api.github.com/notifications", auth=(GITHUBUSERNAME, GITHUBTOKEN)
-        )
-        return len(response.json())
+        url = os.environ.get("GITHUB_API_URL", "https://api.github.com")
+        url = f"{url.rstrip('/')}/notifications"
+        cache = load_json(github_cache_path)
+        polled_at = time.time()
+        if "count" in cache and polled_at < cache.get("poll_after", 0):
+            return cache["count"]
+        auth = (GITHUBUSERNAME, GITHUBTOKEN)
+        cached_pages = cache.get("pages", [])
+
+        def get_page(page):
+            """Return the response and the cache entry for a page."""
+            cached = cached_pages[page - 1] if page <= len(cached_pages) else {}
+            headers = {}
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+            r = requests.get(
+                url,
+                auth=auth,
+                params={"per_page": self.per_page, "page": page},
+                headers=headers,
+                timeout=self.timeout,
+            )
+            if r.status_code == 304:
+                return r, cached
+            r.raise_for_status()
+            return (
+                r,
+                {
+                    "etag": r.headers.get("ETag"),
+                    "last_modified": r.headers.get("Last-Modified"),
+                    "count": len(r.json()),
+                },
+            )
+
+        response, first_page = get_page(1)
+        poll_interval = int(response.headers.get("X-Poll-Interval", 60))
+        if response.status_code == 304:
+            last_page = len(cached_pages)
+        elif "last" in response.links:
+            last_url = response.links["last"]["url"]
+            query = urllib.parse.parse_qs(urllib.parse.urlparse(last_url).query)
+            last_page = int(query["page"][0])
+        else:
+            last_page = 1
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
+            rest = list(executor.map(get_page, range(2, last_page + 1)))
+        pages = [first_page] + [page for _, page in rest]
+        last_response = rest[-1][0] if rest else response
+        # a 304 carries no Link header: a full last page may have a successor
+        while "next" in last_response.links or (
+            last_response.status_code == 304 and pages[-1]["count"] == self.per_page
+        ):
+            last_response, page = get_page(len(pages) + 1)
+            pages.append(page)
+        while len(pages) > 1 and pages[-1]["count"] == 0:
+            pages.pop()
+
+        count = sum(page["count"] for page in pages)
+        cache = {
+            "count": count,
+            "pages": pages,
+            "poll_after": polled_at + poll_interval,
+        }
+        dump_json(github_cache_path, cache)
+        return count
 
 
 class ScreenshotCountGoal(BashCountGoal):
@@ -601,23 +930,55 @@ class CustomEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Goal):
             return obj.dictionary
+        if isinstance(obj, (datetime, date)):
+            return obj.isoformat()
 
         return json.JSONEncoder.default(self, obj)
 
 
+def complete_slugs(ctx, param, incomplete):
+    """Complete goal slugs from the on-disk index, without touching the network."""
+    try:
+        with open(slug_index_path) as f:
+            slugs = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        slugs = list(custom_goals)
+    return [slug for slug in slugs if slug.startswith(incomplete)]
+
+
 class AllGoals:
     def __init__(self):
-        url = f"https://www.beeminder.com/api/v1/users/{username}/goals.json"
-        r = requests.get(url, params=auth).json()
-        self.goals = [create_goal(**goal) for goal in r]
+        self._goals = None
 
-    def ensure_datapoints(self):
-        with concurrent.futures.ThreadPoolExecutor(max_workers=20) as executor:
-            futures = {executor.submit(goal.get_full_data): goal for goal in self.goals}
-            for future in tqdm.tqdm(
-                concurrent.futures.as_completed(futures), total=len(self.goals)
-            ):
+    @property
+    def goals(self):
+        if self._goals is None:
+            url = f"https://www.beeminder.com/api/v1/users/{username}/goals.json"
+            r = requests.get(url, params=auth, timeout=api_timeout).json()
+            self._goals = [create_goal(**goal) for goal in r]
+            try:
+                dump_json(slug_index_path, sorted(goal.slug for goal in self._goals))
+            except OSError:
+                pass
+        return self._goals
+
+    def iter_full_data(self, goals=None):
+        """Fetch datapoints concurrently, yielding each goal as it arrives."""
+        goals = self.goals if goals is None else goals
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=20)
+        try:
+            futures = {executor.submit(goal.get_full_data): goal for goal in goals}
+            for future in concurrent.futures.as_completed(futures):
                 futures[future].dictionary = future.result()
+                yield futures[future]
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def ensure_datapoints(self):
+        import tqdm
+
+        for _ in tqdm.tqdm(self.iter_full_data(), total=len(self.goals)):
+            pass
         return self
 
     def pick_goal(self, **goal):
@@ -637,7 +998,55 @@ class AllGoals:
         runits: str = None,
     ):
         goals = sorted(self.goals, key=lambda g: g.losedate)
+        matches = self.goal_filter(
+            manual=manual,
+            finished=finished,
+            do_less=do_less,
+            done_today=done_today,
+            over_rate=over_rate,
+            since=since,
+            days=days,
+            runits=runits,
+        )
+        goals = list(filter(matches, goals))
+
+        if n is not None:
+            goals = goals[: int(n)]
+
+        return list(goals)
+
+    def stream_goals(self, n: int = None, **filters):
+        """Like `filter_goals`, but yields goals as their datapoints arrive.
 
+        Goals keep lose date order: each is yielded as soon as it and every
+        goal due before it have arrived, so `n` picks the same goals as in
+        `filter_goals`.
+        """
+        return itertools.islice(self._stream_goals(**filters), n)
+
+    def _stream_goals(self, **filters):
+        matches = self.goal_filter(**filters)
+        goals = sorted(self.goals, key=lambda g: g.losedate)
+        arrived = set()
+        position = 0
+        for goal in self.iter_full_data(goals):
+            arrived.add(id(goal))
+            while position < len(goals) and id(goals[position]) in arrived:
+                if matches(goals[position]):
+                    yield goals[position]
+                position += 1
+
+    @staticmethod
+    def goal_filter(
+        manual: bool = None,
+        finished: bool = None,
+        do_less: bool = None,
+        done_today: bool = None,
+        over_rate: bool = None,
+        since: int = None,
+        days: int = None,
+        runits: str = None,
+    ):
         conditions = dict()
         if finished is not None:
             conditions["finished"] = lambda g: g.won == finished
@@ -658,14 +1067,7 @@ class AllGoals:
         if days is not None:
             conditions["in_days"] = lambda g: g.losedate <= now + timedelta(days=days)
 
-        goals = list(
-            filter(lambda g: all(conditions[key](g) for key in conditions), goals)
-        )
-
-        if n is not None:
-            goals = goals[: int(n)]
-
-        return list(goals)
+        return lambda g: all(conditions[key](g) for key in conditions)
 
 
 all_goals = AllGoals()
@@ -689,6 +1091,254 @@ def ensure_datapoints(goals):
     raise NotImplementedError
 
 
+def stream_records(goals, output_format):
+    """Echo one record per goal as it comes, without paging or table layout."""
+    if output_format == "json":
+        click.echo("[", nl=False)
+    buffer = io.StringIO()
+    writer = None
+    for i, goal in enumerate(goals):
+        record = goal.record
+        if output_format == "csv":
+            if writer is None:
+                writer = csv.DictWriter(buffer, fieldnames=list(record))
+                writer.writeheader()
+            writer.writerow(record)
+            click.echo(buffer.getvalue(), nl=False)
+            buffer.seek(0)
+            buffer.truncate()
+        elif output_format == "json":
+            separator = ",\n " if i else "\n "
+            click.echo(separator + json.dumps(record, cls=CustomEncoder), nl=False)
+        else:
+            click.echo(json.dumps(record, cls=CustomEncoder))
+    if output_format == "json":
+        click.echo("\n]")
+
+
+@dataclass
+class ComputeResult:
+    goal: Goal
+    value: float = None
+    posted: bool = False
+    error: Exception = None
+    seconds: float = None
+    skipped: bool = False
+    # "compute" for the integration, "post" for sending the value to Beeminder
+    phase: str = "compute"
+
+    @property
+    def status(self):
+        if self.skipped:
+            return "skipped"
+        elif isinstance(self.error, concurrent.futures.TimeoutError):
+            return "timeout"
+        elif self.error is not None:
+            return "failed"
+        return "posted" if self.posted else "unchanged"
+
+
+class ExecutionPolicy:
+    """Per-source timeouts and circuit breakers for integrations.
+
+    A source (e.g. "todoist", shared by all Todoist goals) that fails
+    `failure_threshold` times in a row is skipped for `cooldown`, then tried
+    once more. Breakers live in the given state dictionary, so they persist
+    across runs once it is saved.
+    """
+
+    failure_threshold = 3
+    cooldown = timedelta(minutes=30)
+
+    def __init__(self, state, config=None):
+        config = config or {}
+        self.timeouts = config.get("timeouts", {})
+        self.failure_threshold = config.get("failure_threshold", self.failure_threshold)
+        if "cooldown_minutes" in config:
+            self.cooldown = timedelta(minutes=config["cooldown_minutes"])
+        self.breakers = state.setdefault("breakers", {})
+        self.last_values = state.setdefault("last_value", {})
+        self.failed_this_run = set()
+
+    @staticmethod
+    def source(goal):
+        return getattr(goal, "source", goal.slug)
+
+    def prepare(self, goal):
+        """Apply the configured timeout, so it also reaches worker processes."""
+        timeout = self.timeouts.get(self.source(goal), goal.timeout)
+        goal.timeout = self.timeouts.get(goal.slug, timeout)
+        return goal
+
+    def is_open(self, goal):
+        breaker = self.breakers.get(self.source(goal))
+        if breaker is None or breaker["failures"] < self.failure_threshold:
+            return False
+        failed_at = datetime.fromisoformat(breaker["failed_at"])
+        return datetime.now(timezone.utc) - failed_at < self.cooldown
+
+    def last_value(self, goal):
+        if goal.slug in self.last_values:
+            return self.last_values[goal.slug]
+        return goal.last_datapoint and goal.last_datapoint.value
+
+    def record(self, result):
+        """Update the breaker of the goal's source.
+
+        Only failures of the integration itself count, and at most once per
+        source per run, however many goals share it.
+        """
+        source = self.source(result.goal)
+        if result.skipped:
+            return
+        elif result.error is None:
+            if source not in self.failed_this_run:
+                self.breakers.pop(source, None)
+            self.last_values[result.goal.slug] = result.value
+        elif result.phase != "compute":
+            # the integration worked, but Beeminder did not take the value
+            if source not in self.failed_this_run:
+                self.breakers.pop(source, None)
+        else:
+            breaker = self.breakers.setdefault(source, {"failures": 0})
+            if source not in self.failed_this_run:
+                breaker["failures"] += 1
+                self.failed_this_run.add(source)
+            breaker["failed_at"] = datetime.now(timezone.utc).isoformat()
+            breaker["error"] = repr(result.error)
+
+
+_started_queue = None
+
+
+def _set_started_queue(started_queue):
+    global _started_queue
+    _started_queue = started_queue
+
+
+def _timed_compute(key, goal, started_queue=None):
+    """Run `goal.compute`, first reporting when it actually started."""
+    (started_queue or _started_queue).put((key, time.time()))
+    return goal.compute()
+
+
+def compute_goals(goals, workers=None, timeout=None, policy=None):
+    """Compute custom goals concurrently and post changed values.
+
+    Goals run in a thread or process pool as per their `executor`, each given
+    `timeout` (or its own `timeout`) seconds from when it starts running.
+    `workers` defaults to one thread per goal, so the slowest integration
+    sets the wall time, and one process per CPU. Yields a
+    `ComputeResult` per goal as soon as it is settled; goals that time out
+    are abandoned, not killed - see `abandon_workers`. With a `policy`, goals
+    whose source's breaker is open are skipped with their last known value,
+    and every outcome is recorded on the policy.
+    """
+    if policy is not None:
+        for result in _compute_goals(goals, workers, timeout, policy):
+            policy.record(result)
+            yield result
+    else:
+        yield from _compute_goals(goals, workers, timeout, policy)
+
+
+def _compute_goals(goals, workers, timeout, policy):
+    import multiprocessing
+
+    threads = concurrent.futures.ThreadPoolExecutor(
+        max_workers=workers or max(1, len(goals))
+    )
+    process_started = multiprocessing.Queue()
+    processes = concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=_set_started_queue, initargs=(process_started,)
+    )
+    thread_started = queue.SimpleQueue()
+    # posting gets its own pool, so it never queues behind computations
+    posts = concurrent.futures.ThreadPoolExecutor(max_workers=5)
+    started = time.monotonic()
+
+    if policy is not None:
+        goals = [policy.prepare(goal) for goal in goals]
+        for goal in [goal for goal in goals if policy.is_open(goal)]:
+            goals.remove(goal)
+            yield ComputeResult(goal, policy.last_value(goal), skipped=True)
+    computing = {}
+    for key, goal in enumerate(goals):
+        if goal.executor == "process":
+            future = processes.submit(_timed_compute, key, goal)
+        else:
+            future = threads.submit(_timed_compute, key, goal, thread_started)
+        computing[future] = goal
+    keys = {key: future for key, future in enumerate(computing)}
+    deadlines = {}
+    posting = {}
+    pending = set(computing)
+    try:
+        while pending:
+            for started_queue in [thread_started, process_started]:
+                while not started_queue.empty():
+                    key, started_at = started_queue.get()
+                    goal = computing.get(keys[key])
+                    if goal is not None:
+                        elapsed = time.time() - started_at
+                        deadline = time.monotonic() - elapsed
+                        deadlines[keys[key]] = deadline + (timeout or goal.timeout)
+            wait_for = min(deadlines.get(f, math.inf) for f in pending)
+            if any(f in computing and f not in deadlines for f in pending):
+                # poll for goals leaving the queue, so their clocks can start
+                wait_for = min(wait_for, time.monotonic() + 0.1)
+            done, pending = concurrent.futures.wait(
+                pending,
+                timeout=None
+                if wait_for == math.inf
+                else max(0, wait_for - time.monotonic()),
+                return_when=concurrent.futures.FIRST_COMPLETED,
+            )
+            for future in done:
+                if future in computing:
+                    goal = computing.pop(future)
+                    try:
+                        value, message = future.result()
+                    except Exception as e:
+                        yield ComputeResult(goal, error=e)
+                        continue
+                    post = posts.submit(goal.post_computed, value, message)
+                    posting[post] = (goal, value)
+                    pending.add(post)
+                else:
+                    goal, value = posting.pop(future)
+                    seconds = time.monotonic() - started
+                    try:
+                        posted = future.result() is not None
+                    except Exception as e:
+                        yield ComputeResult(
+                            goal, value, error=e, seconds=seconds, phase="post"
+                        )
+                    else:
+                        yield ComputeResult(
+                            goal, value, posted, seconds=seconds, phase="post"
+                        )
+            now = time.monotonic()
+            for future in [f for f in pending if deadlines.get(f, math.inf) <= now]:
+                pending.discard(future)
+                future.cancel()
+                goal = computing.pop(future)
+                yield ComputeResult(goal, error=concurrent.futures.TimeoutError())
+    finally:
+        threads.shutdown(wait=False, cancel_futures=True)
+        processes.shutdown(wait=False, cancel_futures=True)
+        posts.shutdown(wait=False, cancel_futures=True)
+        process_started.close()
+
+
+def abandon_workers(results):
+    """Exit without joining workers still stuck in timed-out goals."""
+    if any(result.status == "timeout" for result in results):
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(1)
+
+
 @click.group(invoke_without_command=True, cls=AliasedGroup)
 @click.option("-m/-nm", "--manual/--no-manual", default=None)
 @click.option("-dl/-ndl", "--do-less/--no-do-less", default=False)
@@ -702,6 +1352,13 @@ def ensure_datapoints(goals):
 @click.option("-r", "--random", is_flag=True)
 @click.option("-w", "--watch", is_flag=True)
 @click.option("--step", type=int, default=3)
+@click.option(
+    "--format",
+    "output_format",
+    type=click.Choice(["table", "json", "ndjson", "csv"]),
+    default="table",
+    help="Stream machine-readable records instead of the paged table.",
+)
 @click.pass_context
 def beeminder(
     ctx,
@@ -718,9 +1375,26 @@ def beeminder(
     random=False,
     watch=False,
     step=3,
+    output_format="table",
 ):
     """Display timings for beeminder goals."""
-    if ctx.invoked_subcommand is None:
+    if ctx.invoked_subcommand is None and output_format != "table":
+        if random or watch:
+            option = "--random" if random else "--watch"
+            raise click.UsageError(f"{option} cannot be used with --format.")
+        goals = all_goals.stream_goals(
+            manual=manual,
+            do_less=do_less,
+            done_today=done_today,
+            days=days,
+            since=since,
+            finished=finished,
+            n=n,
+            runits=runits,
+            over_rate=over_rate,
+        )
+        stream_records(goals, output_format)
+    elif ctx.invoked_subcommand is None:
         all_goals.ensure_datapoints()
         goals = list(
             all_goals.filter_goals(
@@ -737,6 +1411,8 @@ def beeminder(
         )
 
         def display(goals):
+            from tabulate import tabulate
+
             alld = (goal.summary for goal in goals)
             contents = [goals[0].summary_header, *alld]
             table = tabulate(contents, headers="firstrow").splitlines()
@@ -786,26 +1462,32 @@ def beeminder(
 
 
 @beeminder.command()
-@click.argument("goal")
+@click.argument("goal", shell_complete=complete_slugs)
 def show(goal):
     goal = all_goals.pick_goal(slug=goal)
     click.secho(goal.summary, fg=goal.color)
 
 
 @beeminder.command()
-@click.argument("goal", type=str)
+@click.argument("goal", type=str, shell_complete=complete_slugs)
 @click.argument("update_value", required=False)
 @click.argument("description", type=str, required=False)
 @click.option("-d", "--date", type=str, default=None)
-def update(goal, update_value, description=None, date=None):
+@click.option("--refresh", is_flag=True, help="Refetch server-computed fields.")
+def update(goal, update_value, description=None, date=None, refresh=False):
     goal = all_goals.pick_goal(slug=goal)
     if date is not None:
+        import dateparser
+
         date = dateparser.parse(date)
-    goal.update(update_value, description, date)
+    if isinstance(goal, ComputedGoalMixIn):
+        goal.update()
+    else:
+        goal.update(update_value, description, date, refresh=refresh)
 
 
 @beeminder.command()
-@click.argument("goal", type=str)
+@click.argument("goal", type=str, shell_complete=complete_slugs)
 def web(goal):
     """Display a goal"""
     goal = all_goals.pick_goal(slug=goal)
@@ -819,6 +1501,8 @@ def fetch_remotes():
     def only_remotes(goal):
         return not (goal.autodata is None or goal.autodata == "api")
 
+    import tqdm
+
     goals = list(filter(only_remotes, all_goals.goals))
     with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
         futures = {executor.submit(goal.update): goal for goal in goals}
@@ -828,6 +1512,97 @@ def fetch_remotes():
             pass
 
 
+def run_custom_goals(run_all=False, workers=None, timeout=None, summarize=None):
+    """Compute and post due custom goals under the `ExecutionPolicy`.
+
+    Intervals are read, in minutes, from the `intervals` mapping in config.json
+    in the app directory; goals missing from it fall back to
+    `default_interval`, and are skipped if neither is set, unless `run_all`.
+    Breakers, last values and computation times are saved to state.json.
+    `summarize(results)` reports on the run, before workers stuck in
+    timed-out goals are abandoned.
+    """
+    config = load_json(config_path)
+    intervals = config.get("intervals", {})
+    default_interval = config.get("default_interval")
+    state = load_json(state_path)
+    policy = ExecutionPolicy(state, config)
+    last_computed = state.setdefault("last_computed", {})
+    started = datetime.now(timezone.utc)
+
+    def is_due(goal):
+        interval = intervals.get(goal.slug, default_interval)
+        if interval is None:
+            return run_all
+        last = last_computed.get(goal.slug)
+        if run_all or last is None:
+            return True
+        return started - datetime.fromisoformat(last) >= timedelta(minutes=interval)
+
+    goals = [
+        goal
+        for goal in all_goals.goals
+        if isinstance(goal, ComputedGoalMixIn) and is_due(goal)
+    ]
+    results = []
+    for result in compute_goals(goals, workers, timeout, policy):
+        results.append(result)
+        if result.error is not None:
+            click.secho(
+                f"{result.phase.capitalize()} of {result.goal} failed: "
+                f"{result.error!r}",
+                fg="red",
+                err=True,
+            )
+        elif result.skipped:
+            source = policy.source(result.goal)
+            click.echo(f"Skipping {result.goal}, {source} keeps failing.")
+        else:
+            last_computed[result.goal.slug] = started.isoformat()
+    dump_json(state_path, state)
+    if summarize is not None:
+        summarize(results)
+    posted = sum(result.posted for result in results)
+    elapsed = datetime.now(timezone.utc) - started
+    click.echo(
+        f"Computed {len(goals)} goals, posted {posted}, "
+        f"in {elapsed.total_seconds():.1f}s."
+    )
+    abandon_workers(results)
+
+
+@beeminder.command()
+@click.option("-a", "--all", "run_all", is_flag=True, help="Ignore intervals.")
+@click.option("--workers", type=int, default=None, help="Default: one per goal.")
+def run_scheduled(run_all=False, workers=None):
+    """Recompute custom goals whose interval has passed; post only changes."""
+    run_custom_goals(run_all, workers)
+
+
+@beeminder.command()
+@click.option("--workers", type=int, default=None, help="Default: one per goal.")
+@click.option("-t", "--timeout", type=float, default=None, help="Seconds per goal.")
+def update_custom(workers=None, timeout=None):
+    """Compute and post all integration-backed goals concurrently."""
+    from tabulate import tabulate
+
+    def summarize(results):
+        rows = [
+            (
+                result.goal.slug,
+                result.status,
+                result.value,
+                result.seconds and f"{result.seconds:.1f}s",
+                result.error and repr(result.error),
+            )
+            for result in sorted(results, key=lambda result: result.goal.slug)
+        ]
+        headers = ["goal", "status", "value", "done at", "error"]
+        click.echo(tabulate(rows, headers=headers))
+
+    run_custom_goals(True, workers, timeout, summarize)
+
+
 @beeminder.command()
 def debug():
     """Open a debugger with goal data pulled."""
@@ -0,0 +1,161 @@
+"""Scaling micro-benchmarks for `Goal` on synthetic accounts.
+
+Goal-count benchmarks (`create_goal`, `color`, `filter_goals`) run over N
+goals; history benchmarks (`Goal.datapoints`, `data_rate`, `summary`) run on
+a single goal with N datapoints. Reports the best wall time and the peak
+traced allocation of each.
+
+>>> python benchmarks/bench_goals.py
+>>> python benchmarks/bench_goals.py --sizes 10,1000 --repeat 5
+
+To guard against regressions, record a baseline once and check against it;
+`--check` exits non-zero if any benchmark's time or peak allocation exceeds
+the baseline by more than `--margin`:
+
+>>> python benchmarks/bench_goals.py --sizes 10,1000 --save-baseline base.json
+>>> python benchmarks/bench_goals.py --sizes 10,1000 --check base.json
+"""
+import gc
+import json
+import os
+import pathlib
+import sys
+import time
+import tracemalloc
+
+import click
+from tabulate import tabulate
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+os.environ.setdefault("BEEMINDER_USERNAME", "benchmark")
+os.environ.setdefault("BEEMINDER_TOKEN", "benchmark")
+
+import beeminder  # noqa: E402
+from synthetic import GOAL_TYPES, make_goal  # noqa: E402
+
+DATAPOINTS_PER_GOAL = 30
+TEMPLATES = 60
+
+
+def goal_dicts(n):
+    """N goal dictionaries, sharing datapoint lists between a few templates."""
+    templates = [
+        make_goal(f"template-{i}", goal_type, DATAPOINTS_PER_GOAL)
+        for i, goal_type in zip(range(TEMPLATES), list(GOAL_TYPES) * TEMPLATES)
+    ]
+    return [dict(templates[i % TEMPLATES], slug=f"goal-{i}") for i in range(n)]
+
+
+def all_goals(goals):
+    account = beeminder.AllGoals()
+    account._goals = goals
+    return account
+
+
+def invalidated(goals):
+    for goal in goals:
+        goal.invalidate_cache()
+    return goals
+
+
+def goal_count_benchmarks(n):
+    dicts = goal_dicts(n)
+    goals = [beeminder.create_goal(**d) for d in dicts]
+    account = all_goals(goals)
+    yield "create_goal", lambda: [beeminder.create_goal(**d) for d in dicts]
+    yield "color", lambda: [goal.color for goal in goals]
+    yield "filter_goals", lambda: account.filter_goals(finished=False)
+    yield "filter_goals(over_rate)", lambda: all_goals(invalidated(goals)).filter_goals(
+        over_rate=True
+    )
+
+
+def history_benchmarks(n):
+    for goal_type in GOAL_TYPES:
+        goal = beeminder.create_goal(**make_goal(f"bench-{goal_type}", goal_type, n))
+        yield f"datapoints[{goal_type}]", lambda goal=goal: goal.datapoints
+        yield f"data_rate[{goal_type}]", lambda goal=goal: invalidated(
+            [goal]
+        ) and goal.data_rate
+        yield f"summary[{goal_type}]", lambda goal=goal: invalidated(
+            [goal]
+        ) and goal.summary
+
+
+def measure(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    gc.collect()
+    tracemalloc.start()
+    function()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(timings), peak
+
+
+@click.command()
+@click.option("--sizes", default="10,1000,100000", help="Comma-separated N values.")
+@click.option("--repeat", type=int, default=3)
+@click.option("--only", type=click.Choice(["goals", "history"]), default=None)
+@click.option("--save-baseline", type=click.Path(dir_okay=False), default=None)
+@click.option("--check", type=click.Path(exists=True, dir_okay=False), default=None)
+@click.option("--margin", type=float, default=0.5, help="Allowed relative excess.")
+@click.option(
+    "--min-ms", type=float, default=1.0, help="Ignore timing excesses below this."
+)
+def main(sizes, repeat, only, save_baseline, check, margin, min_ms):
+    """Run the Goal scaling benchmarks."""
+    suites = {"goals": goal_count_benchmarks, "history": history_benchmarks}
+    if only is not None:
+        suites = {only: suites[only]}
+    rows = []
+    results = {}
+    for n in [int(size) for size in sizes.split(",")]:
+        for suite, benchmarks in suites.items():
+            for name, function in benchmarks(n):
+                seconds, peak = measure(function, repeat)
+                results[f"{suite}/{name}/{n}"] = {
+                    "ms": seconds * 1e3,
+                    "peak_kib": peak / 1024,
+                }
+                rows.append(
+                    (suite, name, n, f"{seconds * 1e3:.3f}", f"{peak / 1024:.1f}")
+                )
+                click.echo(f"{name} N={n}: {seconds * 1e3:.3f} ms", err=True)
+    click.echo(
+        tabulate(rows, headers=["suite", "benchmark", "N", "best ms", "peak KiB"])
+    )
+    if save_baseline is not None:
+        with open(save_baseline, "w") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if check is not None:
+        with open(check) as f:
+            baseline = json.load(f)
+        regressions = find_regressions(results, baseline, margin, min_ms)
+        for regression in regressions:
+            click.secho(regression, fg="red", err=True)
+        if regressions:
+            raise SystemExit(1)
+
+
+def find_regressions(results, baseline, margin, min_ms):
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline:
+            continue
+        for metric, floor in [("ms", min_ms), ("peak_kib", 0)]:
+            limit = baseline[key][metric] * (1 + margin)
+            if result[metric] > limit and result[metric] - limit > floor:
+                regressions.append(
+                    f"{key}: {metric} {result[metric]:.3f} > {limit:.3f} "
+                    f"(baseline {baseline[key][metric]:.3f})"
+                )
+    return regressions
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Synthetic Beeminder account generator for benchmarks.
+
+Produces goal dictionaries shaped like the `goals.json` and
+`goals/<slug>.json?datapoints=true` API payloads, for every goal type
+handled in `Goal.data_rate`.
+
+>>> python benchmarks/synthetic.py --goals 1000 --datapoints 365 -o /tmp/account
+writes /tmp/account/goals.json and /tmp/account/goals/<slug>.json
+"""
+import json
+import pathlib
+import random
+from datetime import datetime, timedelta
+
+import click
+
+# goal_type: (yaw, kyoom, typical step, starting value)
+GOAL_TYPES = {
+    "hustler": (1, True, 1.0, 0.0),
+    "drinker": (-1, True, 0.5, 0.0),
+    "biker": (1, False, 2.0, 0.0),
+    "fatloser": (-1, False, 0.2, 90.0),
+    "gainer": (1, False, 0.2, 60.0),
+    "inboxer": (-1, False, 3.0, 200.0),
+}
+RUNITS = ["d", "w", "m", "y"]
+
+
+def make_datapoints(goal_type, n, end, rng, first_id=0):
+    yaw, kyoom, step, value = GOAL_TYPES[goal_type]
+    start = end - timedelta(days=n)
+    datapoints = []
+    for i in range(n):
+        moment = start + timedelta(days=i, seconds=rng.randrange(86400))
+        if kyoom:
+            value = round(rng.expovariate(1 / step), 2)
+        elif goal_type == "biker":
+            value += round(rng.expovariate(1 / step), 2)
+        else:
+            value += round(rng.gauss(yaw * step / 2, step), 2)
+        timestamp = int(moment.timestamp())
+        daystamp = moment.strftime("%Y%m%d")
+        comment = f"synthetic {goal_type} datapoint {i}"
+        datapoints.append(
+            {
+                "value": value,
+                "comment": comment,
+                "timestamp": timestamp,
+                "id": f"{first_id + i:024x}",
+                "updated_at": timestamp,
+                "requestid": None,
+                "canonical": f'{moment.day} {value} "{comment}"',
+                "origin": "api",
+                "daystamp": daystamp,
+                "fulltext": f"{moment:%Y-%b-%d} entered at {moment:%H:%M} via api",
+            }
+        )
+    return datapoints
+
+
+def make_goal(slug, goal_type, n_datapoints, end=None, rng=None):
+    """Return a goal dictionary, including `n_datapoints` days of history."""
+    rng = rng or random.Random(slug)
+    end = end or datetime.now()
+    yaw, kyoom, step, _ = GOAL_TYPES[goal_type]
+    datapoints = make_datapoints(goal_type, max(n_datapoints, 1), end, rng)
+    runits = rng.choice(RUNITS)
+    rate = step * {"d": 1, "w": 7, "m": 30, "y": 365}[runits]
+    if kyoom:
+        curval = sum(dp["value"] for dp in datapoints)
+    else:
+        curval = datapoints[-1]["value"]
+    lane = rng.randint(-2, 3)
+    return {
+        "slug": slug,
+        "title": f"Synthetic {goal_type} goal {slug}",
+        "goal_type": goal_type,
+        "autodata": rng.choice([None, None, None, "api", "toggl", "gmail"]),
+        "limsum": f"+{step} within 1 day",
+        "headsum": "Curr rate 1/day",
+        "hhmmformat": rng.random() < 0.1,
+        "integery": kyoom,
+        "safebump": curval + yaw * rng.uniform(0, 3 * step),
+        "curval": curval,
+        "rate": rate if rng.random() < 0.95 else None,
+        "mathishard": [0, curval, rate],
+        "runits": runits,
+        "gunits": "units",
+        "yaw": yaw,
+        "lane": lane,
+        "kyoom": kyoom,
+        "won": rng.random() < 0.05,
+        "losedate": int((end + timedelta(days=rng.uniform(0, 30))).timestamp()),
+        "last_datapoint": datapoints[-1],
+        "datapoints": datapoints,
+    }
+
+
+def make_account(n_goals, n_datapoints, seed=0):
+    rng = random.Random(seed)
+    end = datetime.now()
+    types = list(GOAL_TYPES)
+    return [
+        make_goal(f"goal-{i}", types[i % len(types)], n_datapoints, end, rng)
+        for i in range(n_goals)
+    ]
+
+
+@click.command()
+@click.option("--goals", "n_goals", type=int, default=20)
+@click.option("--datapoints", "n_datapoints", type=int, default=365)
+@click.option("--seed", type=int, default=0)
+@click.option(
+    "-o", "--output", type=click.Path(file_okay=False), default="synthetic-account"
+)
+def main(n_goals, n_datapoints, seed, output):
+    """Write a synthetic goals.json and per-goal datapoint payloads."""
+    output = pathlib.Path(output)
+    (output / "goals").mkdir(parents=True, exist_ok=True)
+    goals = make_account(n_goals, n_datapoints, seed)
+    summaries = [{k: v for k, v in g.items() if k != "datapoints"} for g in goals]
+    with open(output / "goals.json", "w") as f:
+        json.dump(summaries, f)
+    for goal in goals:
+        with open(output / "goals" / f"{goal['slug']}.json", "w") as f:
+            json.dump(goal, f)
+    click.echo(f"Wrote {len(goals)} goals to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,10 @@ setup(
     name="beeminder",
     version="0.1",
     py_modules=["beeminder"],
-    install_requires=["Click", "requests", "colorama"],
+    install_requires=["Click>=8.0", "requests", "colorama"],
     entry_points="""
         [console_scripts]
         beeminder=beeminder:beeminder
     """,
-    python_requires=">=3.7",
+    python_requires=">=3.9",
 )
@@ -0,0 +1,7 @@
+import os
+import pathlib
+import sys
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parent.parent))
+os.environ.setdefault("BEEMINDER_USERNAME", "test")
+os.environ.setdefault("BEEMINDER_TOKEN", "test")
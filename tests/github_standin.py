@@ -0,0 +1,126 @@
+"""Local stand-in for GitHub's `/notifications` endpoint.
+
+Serves a configurable number of fake notifications with Link pagination,
+per-page ETag/Last-Modified validators (answering 304 when they match) and an
+X-Poll-Interval header, and records the status of every response. Point
+`GithubCountGoal` at it with GITHUB_API_URL:
+
+>>> python tests/github_standin.py --notifications 120 --port 8765
+>>> GITHUB_API_URL=http://127.0.0.1:8765 beeminder update github-inbox
+
+`serve()` starts it in a background thread; test_github.py uses it so.
+"""
+import hashlib
+import json
+import threading
+import urllib.parse
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import click
+
+
+class NotificationsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        parsed = urllib.parse.urlparse(self.path)
+        if parsed.path != "/notifications":
+            self.send_error(404)
+            return
+        query = urllib.parse.parse_qs(parsed.query)
+        per_page = min(int(query.get("per_page", ["50"])[0]), 50)
+        page = int(query.get("page", ["1"])[0])
+
+        items = server.notifications[(page - 1) * per_page : page * per_page]
+        body = json.dumps(items).encode()
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if "If-None-Match" in self.headers:  # takes precedence, as per RFC 7232
+            not_modified = self.headers["If-None-Match"] == etag
+        else:
+            since = self.headers.get("If-Modified-Since")
+            not_modified = since == server.last_modified
+        if not_modified:
+            server.record(self.path, 304)
+            self.send_response(304)
+            self.send_header("X-Poll-Interval", str(server.poll_interval))
+            self.end_headers()
+            return
+
+        last_page = max(1, -(-len(server.notifications) // per_page))
+        server.record(self.path, 200)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", server.last_modified)
+        self.send_header("X-Poll-Interval", str(server.poll_interval))
+        links = []
+        base = f"http://{self.headers['Host']}/notifications?per_page={per_page}"
+        if page < last_page:
+            links.append(f'<{base}&page={page + 1}>; rel="next"')
+            links.append(f'<{base}&page={last_page}>; rel="last"')
+        if links:
+            self.send_header("Link", ", ".join(links))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class NotificationsServer(ThreadingHTTPServer):
+    def __init__(self, address, notifications=0, poll_interval=60):
+        super().__init__(address, NotificationsHandler)
+        self.lock = threading.Lock()
+        self.requests = []
+        self.statuses = []
+        self.poll_interval = poll_interval
+        self.set_notifications(notifications)
+
+    def set_notifications(self, n):
+        """Replace the inbox with `n` notifications."""
+        self.notifications = [
+            {"id": str(i), "unread": True, "subject": {"title": f"Notification {i}"}}
+            for i in range(n)
+        ]
+        self.last_modified = formatdate(usegmt=True)
+
+    def remove_notification(self, index):
+        """Mark one notification as read, e.g. one on the last page."""
+        del self.notifications[index]
+        self.last_modified = formatdate(usegmt=True)
+
+    def record(self, path, status):
+        with self.lock:
+            self.requests.append(path)
+            self.statuses.append(status)
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def serve(notifications=0, poll_interval=60, port=0):
+    """Start a stand-in server in a daemon thread; `shutdown()` it when done."""
+    server = NotificationsServer(("127.0.0.1", port), notifications, poll_interval)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@click.command()
+@click.option("--notifications", type=int, default=120)
+@click.option("--poll-interval", type=int, default=60)
+@click.option("--port", type=int, default=8765)
+def main(notifications, poll_interval, port):
+    """Serve fake GitHub notifications until interrupted."""
+    server = NotificationsServer(("127.0.0.1", port), notifications, poll_interval)
+    click.echo(f"Serving {notifications} notifications at {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        click.echo(f"Served {len(server.requests)} requests.")
+
+
+if __name__ == "__main__":
+    main()
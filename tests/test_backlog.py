@@ -0,0 +1,59 @@
+"""Incremental bookkeeping of BacklogAges."""
+from datetime import datetime, timedelta, timezone
+
+import beeminder
+
+EPOCH = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def parse_days(days):
+    return EPOCH + timedelta(days=days)
+
+
+def test_total_days_sums_item_ages():
+    ages = beeminder.BacklogAges()
+    ages.sync({"a": 0, "b": 2}, parse_days)
+    assert ages.total_days(EPOCH + timedelta(days=5)) == 5 + 3
+
+
+def test_known_ids_are_not_parsed_again():
+    ages = beeminder.BacklogAges()
+    ages.sync({"a": 0, "b": 2}, parse_days)
+    parsed = []
+
+    def parse(days):
+        parsed.append(days)
+        return parse_days(days)
+
+    ages.sync({"a": 0, "b": 2, "c": 4}, parse)
+    assert parsed == [4]
+    assert ages.total_days(EPOCH + timedelta(days=5)) == 5 + 3 + 1
+
+
+def test_cache_round_trip_reuses_ids():
+    ages = beeminder.BacklogAges()
+    ages.sync({"a": 0, "b": 2}, parse_days)
+    restored = beeminder.BacklogAges(ages.created)
+    restored.sync({"a": 0, "b": 2}, lambda raw: 1 / 0)
+    assert restored.total_created == ages.total_created
+
+
+def test_removed_items_leave_the_total():
+    ages = beeminder.BacklogAges()
+    ages.sync({"a": 0, "b": 2, "c": 4}, parse_days)
+    ages.sync({"b": 2}, parse_days)
+    assert len(ages) == 1
+    assert ages.total_days(EPOCH + timedelta(days=5)) == 3
+    ages.sync({}, parse_days)
+    assert ages.total_created == 0
+    assert ages.total_days(EPOCH) == 0
+
+
+def test_naive_dates_are_local_and_mix_with_aware_ones():
+    aware = datetime(2026, 10, 1, 12, tzinfo=timezone.utc)
+    naive = aware.astimezone().replace(tzinfo=None)
+    offset = aware.astimezone(timezone(timedelta(hours=-7)))
+    assert (
+        beeminder.BacklogAges.to_epoch_seconds([aware, naive, offset])
+        == [int(aware.timestamp())] * 3
+    )
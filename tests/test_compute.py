@@ -0,0 +1,77 @@
+"""Concurrent computation and posting of custom goals."""
+import json
+
+import pytest
+import requests
+
+import beeminder
+
+
+class ThreeGoal(beeminder.CountGoal):
+    source = "three"
+
+    def get_count(self):
+        return 3
+
+
+def response(status_code):
+    r = requests.models.Response()
+    r.status_code = status_code
+    r.url = "https://www.beeminder.com/"
+    datapoint = {"value": 3, "timestamp": 100, "daystamp": "20261018", "id": "dp"}
+    r._content = json.dumps(datapoint).encode()
+    return r
+
+
+@pytest.fixture
+def beeminder_status(monkeypatch, tmp_path):
+    monkeypatch.setattr(beeminder, "state_path", tmp_path / "state.json")
+    monkeypatch.setattr(beeminder, "config_path", tmp_path / "config.json")
+    status = {"code": 200}
+    monkeypatch.setattr(
+        beeminder, "increment_beeminder", lambda *args: response(status["code"])
+    )
+    return status
+
+
+def test_failed_post_is_a_post_error(beeminder_status):
+    beeminder_status["code"] = 500
+    state = {}
+    policy = beeminder.ExecutionPolicy(state)
+    goal = ThreeGoal(slug="three", title="Three")
+    (result,) = beeminder.compute_goals([goal], policy=policy)
+    assert result.status == "failed"
+    assert result.phase == "post"
+    assert isinstance(result.error, requests.HTTPError)
+    assert state["breakers"] == {}
+    assert state["last_value"] == {}
+
+
+def test_failed_post_is_retried_next_run(beeminder_status, monkeypatch):
+    monkeypatch.setattr(
+        beeminder.all_goals, "_goals", [ThreeGoal(slug="three", title="Three")]
+    )
+    beeminder_status["code"] = 500
+    beeminder.run_custom_goals(run_all=True)
+    state = beeminder.load_json(beeminder.state_path)
+    assert "three" not in state["last_computed"]
+
+    beeminder_status["code"] = 200
+    beeminder.run_custom_goals(run_all=True)
+    state = beeminder.load_json(beeminder.state_path)
+    assert "three" in state["last_computed"]
+    assert state["last_value"] == {"three": 3}
+
+
+def test_posting_passes_a_timeout(monkeypatch):
+    seen = {}
+
+    def post(url, data, timeout=None):
+        seen["timeout"] = timeout
+        raise requests.Timeout()
+
+    monkeypatch.setattr(requests, "post", post)
+    goal = ThreeGoal(slug="three", title="Three")
+    (result,) = beeminder.compute_goals([goal])
+    assert seen["timeout"] == beeminder.api_timeout
+    assert (result.status, result.phase) == ("failed", "post")
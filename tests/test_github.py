@@ -0,0 +1,71 @@
+"""GithubCountGoal polling against the local stand-in server."""
+import pytest
+
+import beeminder
+from github_standin import serve
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    server = serve(notifications=237, poll_interval=0)
+    monkeypatch.setattr(beeminder, "github_cache_path", tmp_path / "github.json")
+    monkeypatch.setenv("GITHUB_API_URL", server.url)
+    monkeypatch.setenv("GITHUBUSERNAME", "user")
+    monkeypatch.setenv("GITHUBTOKEN", "token")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def goal():
+    return beeminder.GithubCountGoal(slug="github-inbox", title="GitHub inbox")
+
+
+def test_counts_all_pages(server, goal):
+    assert goal.get_count() == 237
+    assert server.statuses == [200] * 5
+
+
+def test_unchanged_inbox_costs_one_304_per_page(server, goal):
+    goal.get_count()
+    assert goal.get_count() == 237
+    assert server.statuses[5:] == [304] * 5
+
+
+def test_changed_inbox_is_refetched(server, goal):
+    goal.get_count()
+    server.set_notifications(60)
+    assert goal.get_count() == 60
+    # page 1 holds the same 50 notifications; the rest changed or emptied
+    assert sorted(server.statuses[5:]) == [200, 200, 200, 200, 304]
+
+
+def test_removal_on_last_page_is_counted(server, goal):
+    goal.get_count()
+    server.remove_notification(-1)
+    assert goal.get_count() == 236
+    assert sorted(server.statuses[5:]) == [200, 304, 304, 304, 304]
+
+
+def test_shrunk_inbox_drops_empty_pages(server, goal):
+    goal.get_count()
+    server.set_notifications(60)
+    goal.get_count()
+    assert goal.get_count() == 60
+    assert server.statuses[10:] == [304, 304]
+
+
+def test_new_pages_are_followed(server, goal):
+    server.set_notifications(50)
+    assert goal.get_count() == 50
+    server.set_notifications(120)
+    assert goal.get_count() == 120
+
+
+def test_poll_interval_is_honoured(server, goal):
+    server.poll_interval = 600
+    goal.get_count()
+    server.set_notifications(3)
+    assert goal.get_count() == 237
+    assert len(server.requests) == 5
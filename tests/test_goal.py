@@ -0,0 +1,88 @@
+"""Local bookkeeping of Goal, without network access."""
+import pytest
+
+import beeminder
+
+
+def datapoint(timestamp, value, daystamp="20261018", **extra):
+    return {
+        "value": value,
+        "comment": "c",
+        "timestamp": timestamp,
+        "id": f"dp-{timestamp}",
+        "updated_at": timestamp,
+        "daystamp": daystamp,
+        **extra,
+    }
+
+
+def make_goal(kyoom=False, aggday=None, curval=5):
+    goal = {
+        "slug": "goal",
+        "title": "Goal",
+        "goal_type": "hustler" if kyoom else "inboxer",
+        "kyoom": kyoom,
+        "curval": curval,
+        "last_datapoint": datapoint(100, curval),
+        "datapoints": [datapoint(100, curval)],
+    }
+    if aggday is not None:
+        goal["aggday"] = aggday
+    return beeminder.Goal(**goal)
+
+
+def test_from_dict_ignores_extra_keys_and_fills_canonical():
+    dp = beeminder.Datapoint.from_dict(datapoint(100, 1, status="created"))
+    assert dp.canonical == '18 1 "c"'
+    assert dp.origin is None
+
+
+def test_merged_datapoint_is_normalized():
+    goal = make_goal()
+    goal.merge_datapoint(datapoint(200, 7, status="created"))
+    assert [dp.value for dp in goal.datapoints] == [5, 7]
+    assert "status" not in goal.dictionary["datapoints"][-1]
+
+
+def test_newest_datapoint_sets_curval_of_last_aggday_goal():
+    goal = make_goal()
+    assert goal.merge_datapoint(datapoint(200, 7))
+    assert goal.curval == 7
+    assert goal.last_datapoint.value == 7
+
+
+def test_newest_datapoint_adds_to_cumulative_goal():
+    goal = make_goal(kyoom=True)
+    assert goal.merge_datapoint(datapoint(200, 2))
+    assert goal.curval == 7
+
+
+def test_backdated_datapoint_needs_refresh():
+    goal = make_goal()
+    assert not goal.merge_datapoint(datapoint(50, 1))
+    assert goal.curval == 5
+    assert goal.last_datapoint.value == 5
+    assert len(goal.datapoints) == 2
+
+
+@pytest.mark.parametrize("kyoom, aggday", [(False, "max"), (True, "last")])
+def test_other_aggdays_need_refresh(kyoom, aggday):
+    goal = make_goal(kyoom=kyoom, aggday=aggday)
+    assert not goal.merge_datapoint(datapoint(200, 2))
+    assert goal.curval == 5
+    assert goal.last_datapoint.value == 2
+
+
+def test_update_refreshes_when_datapoint_cannot_be_merged(monkeypatch):
+    class Response:
+        ok = True
+
+        def json(self):
+            return datapoint(50, 1, status="created")
+
+    refreshed = []
+    goal = make_goal()
+    monkeypatch.setattr(beeminder, "increment_beeminder", lambda *a: Response())
+    monkeypatch.setattr(goal, "refresh_metadata", lambda: refreshed.append(True))
+    goal.update(1, "backdated")
+    assert refreshed == [True]